@@ -84,6 +84,11 @@ class QSECNode(QObject):
         return {k: self.conn.cache[(module, k)]
                 for k in self.modules[module]['parameters']}
 
+    def queryCacheItem(self, module, parameter):
+        if parameter in self.modules[module]['parameters']:
+            return self.conn.cache[(module, parameter)]
+        return None
+
     def syncCommunicate(self, action, ident='', data=None):
         reply = self.conn.request(action, ident, data)
         # pylint: disable=not-an-iterable
@@ -20,7 +20,7 @@
 #
 # *****************************************************************************
 
-from collections import OrderedDict
+from functools import partial
 
 from frappy.gui.qt import QCursor, QIcon, QInputDialog, QMenu, QSettings, \
     QVBoxLayout, QWidget, pyqtSignal
@@ -45,9 +45,11 @@ class NodeWidget(QWidget):
         self._node.stateChange.connect(self._set_node_state)
 
         self.detailed = False
-        self._modules = OrderedDict()
+        self._modules = {}
         self._detailedParams = {}
         self._activePlots = {}
+        self._plotLabels = {}  # '<module> -> <param>': (module, param)
+        self._hadPlots = False
 
         self.top_splitter.setStretchFactor(0, 2)
         self.top_splitter.setStretchFactor(1, 10)
@@ -67,22 +69,22 @@ class NodeWidget(QWidget):
         self.consoleWidget.replaceWidget(cmd)
 
         viewLayout = self.viewContent.layout()
+        # avoid a relayout/repaint for every added module widget
+        self.view.setUpdatesEnabled(False)
+        self.viewContent.setUpdatesEnabled(False)
         for module in node.modules:
             widget = ModuleWidget(node, module, self.view)
-            widget.plot.connect(lambda param, module=module:
-                                self.plotParam(module, param))
-            widget.plotAdd.connect(lambda param, module=module:
-                                   self._plotPopUp(module, param))
+            widget.plot.connect(partial(self.plotParam, module))
+            widget.plotAdd.connect(partial(self._plotPopUp, module))
             widget.paramDetails.connect(self.showDetailedParam)
             widget.showDetails(self.detailed)
             self.noPlots.connect(widget.plotsPresent)
             self._modules[module] = widget
             self._detailedParams[module] = {}
-            for param in node.getParameters(module):
-                view = ParameterView(node, module, param)
-                view.setWindowTitle(f'{self._node.equipmentId}:{module}:{param} - Properties')
-                self._detailedParams[module][param] = view
             viewLayout.addWidget(widget)
+        self.viewContent.setUpdatesEnabled(True)
+        self.view.setUpdatesEnabled(True)
+        viewLayout.activate()
 
         self._initNodeInfo()
 
@@ -136,7 +138,13 @@ class NodeWidget(QWidget):
             widget.triggerAnimation()
 
     def showDetailedParam(self, module, param):
-        self._detailedParams[module][param].show()
+        # views are only created on first request, most are never shown
+        view = self._detailedParams[module].get(param)
+        if view is None:
+            view = ParameterView(self._node, module, param)
+            view.setWindowTitle(f'{self._node.equipmentId}:{module}:{param} - Properties')
+            self._detailedParams[module][param] = view
+        view.show()
 
     def _treeContextMenu(self, pos):
         index = self.tree.indexAt(pos)
@@ -152,10 +160,9 @@ class NodeWidget(QWidget):
         if not self._activePlots:
             menu_plot_ext.setEnabled(False)
         else:
-            for (m, p), plot in self._activePlots.items():
-                opt_ext = menu_plot_ext.addAction(f"{m}:{p}")
-                opt_ext.triggered.connect(
-                        lambda plot=plot: self._requestPlot(item, plot))
+            # entries are only created when the submenu is opened
+            menu_plot_ext.aboutToShow.connect(
+                lambda: self._populatePlotExtMenu(menu_plot_ext, item))
 
         menu.addSeparator()
         opt_clear = menu.addAction('Clear Selection')
@@ -164,13 +171,20 @@ class NodeWidget(QWidget):
         # menu.exec(self.mapToGlobal(pos))
         menu.exec(QCursor.pos())
 
+    def _populatePlotExtMenu(self, menu, item):
+        menu.clear()
+        for (m, p), plot in self._activePlots.items():
+            opt_ext = menu.addAction(f"{m}:{p}")
+            opt_ext.triggered.connect(
+                    lambda _=False, plot=plot: self._requestPlot(item, plot))
+
     def _requestPlot(self, item, plot=None):
         module = item.module
         param = item.param or 'value'
         self.plotParam(module, param, plot)
 
     def _plotPopUp(self, module, param):
-        plots = {'%s -> %s' % mp: mp for mp in self._activePlots}
+        plots = self._plotLabels
         dialog = QInputDialog()
         # dialog.setInputMode()
         dialog.setOption(
@@ -200,16 +214,25 @@ class NodeWidget(QWidget):
             plot.addCurve(self._node, module, param)
             plot.setCurveColor(module, param, Colors.colors[1])
             self._activePlots[(module, param)] = plot
+            self._plotLabels[f'{module} -> {param}'] = (module, param)
             plot.closed.connect(lambda: self._removePlot(module, param))
             plot.show()
 
-        self.noPlots.emit(len(self._activePlots) == 0)
+        self._emitNoPlots()
 
         # initial datapoint
-        cache = self._node.queryCache(module)
-        if param in cache:
-            plot.update(module, param, cache[param])
+        item = self._node.queryCacheItem(module, param)
+        if item is not None:
+            plot.update(module, param, item)
 
     def _removePlot(self, module, param):
         self._activePlots.pop((module, param))
-        self.noPlots.emit(len(self._activePlots) == 0)
+        self._plotLabels.pop(f'{module} -> {param}', None)
+        self._emitNoPlots()
+
+    def _emitNoPlots(self):
+        # only notify the module widgets when the plots (dis)appear
+        hasPlots = bool(self._activePlots)
+        if hasPlots != self._hadPlots:
+            self._hadPlots = hasPlots
+            self.noPlots.emit(not hasPlots)
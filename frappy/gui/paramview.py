@@ -21,10 +21,13 @@
 # *****************************************************************************
 
 
-from frappy.gui.qt import QLabel, QSizePolicy, QWidget
+from frappy.gui.qt import QLabel, QWidget
 
 from frappy.gui.util import loadUi
 
+# frozenset of property names -> sorted tuple, shared by all views
+_sortedProps = {}
+
 
 class ParameterView(QWidget):
 
@@ -44,33 +47,28 @@ class ParameterView(QWidget):
 
     def _initParameterWidgets(self):
         # initValues = self._node.queryCache(self._module) #? mix live data?
-        row = 0
-
+        addRow = self.propertyGroupBox.layout().addRow
         font = self.font()
         font.setBold(True)
 
         props = self._node._getDescribingParameterData(self._module,
                                                        self._parameter)
-        for prop in sorted(props):
+        keys = frozenset(props)
+        order = _sortedProps.get(keys)
+        if order is None:
+            order = _sortedProps[keys] = tuple(sorted(keys))
+        for prop in order:
             label = QLabel(prop + ':')
             label.setFont(font)
-            label.setSizePolicy(QSizePolicy.Policy.Minimum,
-                                QSizePolicy.Policy.Preferred)
 
             # make 'display' label
             view = QLabel(str(props[prop]))
-            view.setFont(self.font())
-            view.setSizePolicy(QSizePolicy.Policy.Expanding,
-                               QSizePolicy.Policy.Preferred)
             view.setWordWrap(True)
 
-            self.propertyGroupBox.layout().addWidget(label, row, 0)
-            self.propertyGroupBox.layout().addWidget(view, row, 1)
+            addRow(label, view)
 
             self._propWidgets[prop] = (label, view)
 
-            row += 1
-
     def _updateValue(self, module, parameter, value):
         if module != self._module:
             return
@@ -23,9 +23,9 @@
 """Detachable TabWidget, taken from NICOS GUI TearOffTabBar."""
 
 from frappy.gui.qt import QApplication, QCursor, QDrag, QEvent, QMainWindow, \
-    QMimeData, QMouseEvent, QPixmap, QPoint, QPointF, QSize, QStyle, \
-    QStyleOptionTab, QStylePainter, Qt, QTabBar, QTabWidget, QWidget, \
-    pyqtSignal, pyqtSlot
+    QMimeData, QMouseEvent, QPainter, QPixmap, QPoint, QPointF, QSize, \
+    QStyle, QStyleOptionTab, QStylePainter, Qt, QTabBar, QTabWidget, \
+    QWidget, pyqtSignal, pyqtSlot
 
 # def findTab(tab, w):
 #     widget = w
@@ -79,21 +79,22 @@ class TearOffTabBar(QTabBar):
         if (event.buttons() == Qt.MouseButton.LeftButton) and \
             self._dragInitiated and \
             not self.geometry().contains(event.pos()):
-            finishMoveEvent = QMouseEvent(QEvent.Type.MouseMove,
-                                          QPointF(event.pos()),
-                                          Qt.MouseButton.NoButton,
-                                          Qt.MouseButton.NoButton,
-                                          Qt.KeyboardModifier.NoModifier)
-            QTabBar.mouseMoveEvent(self, finishMoveEvent)
+            if self.isMovable():
+                # only a movable QTabBar needs to finish its own tab move
+                finishMoveEvent = QMouseEvent(QEvent.Type.MouseMove,
+                                              QPointF(event.pos()),
+                                              Qt.MouseButton.NoButton,
+                                              Qt.MouseButton.NoButton,
+                                              Qt.KeyboardModifier.NoModifier)
+                QTabBar.mouseMoveEvent(self, finishMoveEvent)
 
             drag = QDrag(self)
             mimedata = QMimeData()
             mimedata.setData('action', b'application/tab-detach')
             drag.setMimeData(mimedata)
 
-            pixmap = self.parentWidget().currentWidget().grab()
-            pixmap = pixmap.scaled(640, 480, Qt.AspectRatioMode.KeepAspectRatio)
-            drag.setPixmap(pixmap)
+            drag.setPixmap(self._dragPixmap(
+                self.parentWidget().currentWidget()))
             drag.setDragCursor(QPixmap(), Qt.DropAction.LinkAction)
 
             dragged = drag.exec(Qt.DropAction.MoveAction)
@@ -112,11 +113,23 @@ class TearOffTabBar(QTabBar):
         else:
             QTabBar.mouseMoveEvent(self, event)
 
+    def _dragPixmap(self, widget):
+        # render scaled down right away instead of grab() + scaled()
+        scale = min(640 / max(widget.width(), 1),
+                    480 / max(widget.height(), 1))
+        pixmap = QPixmap(max(int(widget.width() * scale), 1),
+                         max(int(widget.height() * scale), 1))
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.scale(scale, scale)
+        widget.render(painter)
+        painter.end()
+        return pixmap
+
     def dragEnterEvent(self, event):
         mimedata = event.mimeData()
-        formats = mimedata.formats()
-        if 'action' in formats and \
-           mimedata.data('action') == 'application/tab-detach':
+        if mimedata.hasFormat('action') and \
+           bytes(mimedata.data('action')) == b'application/tab-detach':
             event.acceptProposedAction()
         QTabBar.dragEnterEvent(self, event)
 
@@ -130,26 +143,41 @@ class LeftTabBar(TearOffTabBar):
     def __init__(self, parent, text_padding):
         TearOffTabBar.__init__(self, parent)
         self.text_padding = text_padding
+        self._sizeHints = {}  # (text, font key): size hint
+
+    TEXT_FLAGS = Qt.AlignmentFlag.AlignVCenter | Qt.TextFlag.TextDontClip | \
+        Qt.TextFlag.TextShowMnemonic
 
     def paintEvent(self, event):
         painter = QStylePainter(self)
         option = QStyleOptionTab()
+        initStyleOption = self.initStyleOption
+        drawControl = painter.drawControl
+        drawText = painter.drawText
+        tabRectOf = self.tabRect
+        tabText = self.tabText
 
         for index in range(self.count()):
-            self.initStyleOption(option, index)
-            tabRect = self.tabRect(index)
+            initStyleOption(option, index)
+            tabRect = tabRectOf(index)
             tabRect.moveLeft(10)
-            painter.drawControl(QStyle.ControlElement.CE_TabBarTabShape, option)
-            text = self.tabText(index)
-            painter.drawText(tabRect, Qt.AlignmentFlag.AlignVCenter |
-                             Qt.TextFlag.TextDontClip |
-                             Qt.TextFlag.TextShowMnemonic, text)
+            drawControl(QStyle.ControlElement.CE_TabBarTabShape, option)
+            drawText(tabRect, self.TEXT_FLAGS, tabText(index))
 
     def tabSizeHint(self, index):
-        fm = self.fontMetrics()
-        tabSize = fm.boundingRect(
-            self.tabText(index) or 'Ag').size() + QSize(*self.text_padding)
-        return tabSize
+        text = self.tabText(index) or 'Ag'
+        key = (text, self.font().key())
+        tabSize = self._sizeHints.get(key)
+        if tabSize is None:
+            fm = self.fontMetrics()
+            tabSize = fm.boundingRect(text).size() + QSize(*self.text_padding)
+            self._sizeHints[key] = tabSize
+        return QSize(tabSize)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.FontChange:
+            self._sizeHints.clear()
+        TearOffTabBar.changeEvent(self, event)
 
 
 class TearOffTabWidget(QTabWidget):
@@ -200,6 +228,7 @@ class TearOffTabWidget(QTabWidget):
         tabBar.tabMoved.connect(self.moveTab)
         self.currentChanged.connect(self.tabChangedTab)
         self.tabIdx = {}
+        self._byWidget = {}  # id(widget): TabWidgetStorage
         # don't draw a frame around the tab contents
         self.setStyleSheet('QTabWidget:tab:disabled{width:0;height:0;'
                            'margin:0;padding:0;border:none}')
@@ -211,37 +240,37 @@ class TearOffTabWidget(QTabWidget):
         #         AuxiliarySubWindow(entry[1:], window, menuwindow, self,
         #                            margins), entry[0])
 
+    @pyqtSlot(object, object)
     def moveTab(self, from_ind, to_ind):
-        w = self.widget(from_ind)
-        text = self.tabText(from_ind)
-        self.removeTab(from_ind)
-        self.insertTab(to_ind, w, text)
+        self.tabBar().moveTab(from_ind, to_ind)
         self.setCurrentIndex(to_ind)
 
     def _findFirstWindow(self, w):
         widget = w
-        while True:
-            parent = widget.parent()
-            if not parent:
-                break
-            widget = parent
+        for widget in iterParents(w):
             if isinstance(widget, QMainWindow):
                 break
         return widget
 
-    def _tabWidgetIndex(self, widget):
+    def _tabWidgetIndex(self, wanted):
+        widget = self.widget
         for i in range(self.tabBar().count()):
-            if self.widget(i) == widget:
+            if widget(i) is wanted:
                 return i
         return -1
 
     def tabInserted(self, index):
         w = self.widget(index)
-        for i in self.tabIdx.values():
-            if i.widget == w:
-                return
-        self.tabIdx[index] = self.TabWidgetStorage(index, self.widget(index),
-                                                   self.tabText(index))
+        if id(w) in self._byWidget:
+            return
+        self._storeTab(self.TabWidgetStorage(index, w, self.tabText(index)))
+
+    def _storeTab(self, storage):
+        old = self.tabIdx.get(storage.index)
+        if old is not None:
+            self._byWidget.pop(id(old.widget), None)
+        self.tabIdx[storage.index] = storage
+        self._byWidget[id(storage.widget)] = storage
 
     def _setPanelToolbars(self, panel, visible):
         for tb in panel.getToolbars():
@@ -286,15 +315,14 @@ class TearOffTabWidget(QTabWidget):
                 panel = panel.layout().itemAt(0).widget()
         return panel
 
+    @pyqtSlot(object, object)
     def detachTab(self, index, point):
         detachWindow = DetachedWindow(self.tabText(index).replace('&', ''),
                                       self.parentWidget())
-        w = self.widget(index)
-        for i in self.tabIdx.values():
-            if i.widget == w:
-                detachWindow.tabIdx = self.tabIdx[i.index].index
-                self.tabIdx[i.index].detached = detachWindow
-                break
+        storage = self._byWidget.get(id(self.widget(index)))
+        if storage is not None:
+            detachWindow.tabIdx = storage.index
+            storage.detached = detachWindow
 
         detachWindow.closed.connect(self.attachTab)
 
@@ -311,9 +339,12 @@ class TearOffTabWidget(QTabWidget):
         # self._moveMenuTools(tearOffWidget)
         # self._moveActions(tearOffWidget, detachWindow)
 
+        # paint only once, with the final size and position
+        detachWindow.setUpdatesEnabled(False)
         detachWindow.setWidget(tearOffWidget)
         detachWindow.resize(tearOffWidget.size())
         detachWindow.move(point)
+        detachWindow.setUpdatesEnabled(True)
         detachWindow.show()
 
     # def _moveMenuTools(self, widget):
@@ -342,8 +373,8 @@ class TearOffTabWidget(QTabWidget):
     #            window.addToolBar(toolbar)
     #            toolbar.show()
 
+    @pyqtSlot(object)
     def attachTab(self, detach_window):
-        detach_window.closed.connect(self.attachTab)
         #detach_window.saveSettings(False)
         tearOffWidget = detach_window.centralWidget()
         #panel = self._getPanel(tearOffWidget)
@@ -361,29 +392,28 @@ class TearOffTabWidget(QTabWidget):
         #            for action in p.menuToolsActions:
         #                topLevelWindow.menuTools.removeAction(action)
 
-        newIndex = -1
-
-        for i in range(self.tabBar().count()):
-            w = self.widget(i)
-            for j in self.tabIdx.values():
-                if j.widget == w and j.index > detach_window.tabIdx:
-                    newIndex = i
-                    break
-            else:
-                continue
-            break
-
-        if newIndex == -1:
-            newIndex = self.tabBar().count()
+        # insert before the first tab which was originally behind it
+        target = detach_window.tabIdx
+        widget = self.widget
+        byWidget = self._byWidget
+        count = self.tabBar().count()
+        newIndex = count
+        for i in range(count):
+            j = byWidget.get(id(widget(i)))
+            if j is not None and j.index > target:
+                newIndex = i
+                break
 
+        self.setUpdatesEnabled(False)
         newIndex = self.insertTab(newIndex, tearOffWidget,
                                   detach_window.windowTitle())
         if newIndex != -1:
             self.setCurrentIndex(newIndex)
+        self.setUpdatesEnabled(True)
 
-        idx = self.find_widget(tearOffWidget)
-        self.tabIdx[idx].detached = None
+        self._byWidget[id(tearOffWidget)].detached = None
 
+    @pyqtSlot(int)
     def tabChangedTab(self, index):
         # for i in range(self.count()):
         #     for p in self.widget(i).panels:
@@ -430,15 +460,13 @@ class TearOffTabWidget(QTabWidget):
         #sgroup = SettingGroup(label)
         #with sgroup as settings:
         #    detached = settings.value('detached', False, bool)
-        index = len(self.tabIdx)
-        self.tabIdx[index] = self.TabWidgetStorage(index, widget, label)
+        storage = self.TabWidgetStorage(len(self.tabIdx), widget, label)
+        self._storeTab(storage)
         #if not detached:
         index = self.addTab(widget, label)
         if not label or label.isspace():
             self.setTabEnabled(index, False)
-        for i in self.tabIdx.values():  # search for it in the list of tabs
-            if i.widget == widget:
-                i.setDetached(None)
+        storage.setDetached(None)
         #else:
         #    detachWindow = DetachedWindow(label.replace('&', ''),
         #                                  self.parentWidget())
@@ -465,10 +493,8 @@ class TearOffTabWidget(QTabWidget):
         #    detachWindow.show()
 
     def find_widget(self, widget):
-        for idx, tab in self.tabIdx.items():
-            if tab.widget == widget:
-                return idx
-        return None
+        tab = self._byWidget.get(id(widget))
+        return None if tab is None else tab.index
 
     def replace_widget(self, old_widget, new_widget, title=None):
         """If old_widget is a child of either a tab or a detached window, it will
@@ -479,6 +505,8 @@ class TearOffTabWidget(QTabWidget):
         wstore = self.tabIdx[idx]
         if title:
             wstore.title = title
+        del self._byWidget[id(old_widget)]
+        self._byWidget[id(new_widget)] = wstore
         if wstore.detached:
             wstore.detached.setWidget(new_widget)
         else:
@@ -489,11 +517,8 @@ class TearOffTabWidget(QTabWidget):
 
     def topLevelWidget(self, w):
         widget = w
-        while True:
-            parent = widget.parent()
-            if not parent:
-                break
-            widget = parent
+        for widget in iterParents(w):
+            pass
         return widget
 
     def close_current(self):
@@ -542,14 +567,16 @@ class DetachedWindow(QMainWindow):
     #         settings.setValue('windowstate', self.saveState())
 
 
+def iterParents(widget):
+    """iterate over the parents of widget, starting with the closest"""
+    widget = widget.parent()
+    while widget:
+        yield widget
+        widget = widget.parent()
+
+
 def firstWindow(w):
-    widget = w
-    while True:
-        parent = widget.parent()
-        if not parent:
-            widget = None
-            break
-        widget = parent
+    for widget in iterParents(w):
         if widget.isWindow():
-            break
-    return widget
+            return widget
+    return None
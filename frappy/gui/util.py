@@ -21,15 +21,38 @@
 # *****************************************************************************
 
 
+import re
+from io import StringIO
 from os import path
 
 from frappy.gui.qt import QColor, uic
 
 uipath = path.dirname(__file__)
 
+# resources are already registered by frappy.gui.qt
+RESOURCE_IMPORT = re.compile(r'^import \S+_rc$', re.MULTILINE)
+
+_uiClasses = {}
+
+
+def _getUiClass(filename):
+    """compile a .ui file once and return the generated form class"""
+    uiclass = _uiClasses.get(filename)
+    if uiclass is None:
+        code = StringIO()
+        uic.compileUi(filename, code)
+        namespace = {}
+        exec(RESOURCE_IMPORT.sub('', code.getvalue()), namespace)  # pylint: disable=exec-used
+        uiclass = next(v for k, v in namespace.items() if k.startswith('Ui_'))
+        _uiClasses[filename] = uiclass
+    return uiclass
+
 
 def loadUi(widget, uiname, subdir='ui'):
-    uic.loadUi(path.join(uipath, subdir, uiname), widget)
+    ui = _getUiClass(path.join(uipath, subdir, uiname))()
+    ui.setupUi(widget)
+    # make the named children accessible like uic.loadUi does
+    widget.__dict__.update(ui.__dict__)
 
 
 def is_light_theme(palette):
@@ -25,73 +25,44 @@
 __ALL__ = ['Enum']
 
 
-class EnumMember:
+class EnumMember(int):
     """represents one member of an Enum
 
-    has an int-type value and attributes 'name' and 'value'
+    is an int with the additional attributes 'name' and 'enum'
     """
-    __slots__ = ['name', 'value', 'enum']
 
-    def __init__(self, enum, name, value):
+    def __new__(cls, enum, name, value):
         if not isinstance(enum, Enum):
             raise TypeError('1st Argument must be an instance of class Enum()')
-        self.value = int(value)
-        self.enum = enum
-        self.name = name or 'unnamed'
-
-    # to behave like an int for comparisons
-    def __cmp__(self, other):
-        if isinstance(other, EnumMember):
-            other = other.value
-        if isinstance(other, str):
-            if other in self.enum:
-                other = self.enum[other].value
-        try:
-            other = int(other)
-        except Exception:
-            # raise TypeError('%r can not be compared to %r!' %(other, self))
-            return -1  # XXX:!
-        if self.value < other:
-            return -1
-        if self.value > other:
-            return 1
-        return 0
-
-    def __lt__(self, other):
-        return self.__cmp__(other.value if isinstance(other, EnumMember) else other) == -1
-
-    def __le__(self, other):
-        return self.__cmp__(other.value if isinstance(other, EnumMember) else other) < 1
+        member = int.__new__(cls, value)
+        object.__setattr__(member, 'enum', enum)
+        object.__setattr__(member, 'name', name or 'unnamed')
+        return member
+
+    @property
+    def value(self):
+        return int(self)
 
     def __eq__(self, other):
-        if isinstance(other, EnumMember):
-            return other.value == self.value
-        if isinstance(other, int):
-            return other == self.value
-        # compare by name (for (in)equality only)
-        if isinstance(other, str):
-            if other in self.enum:
-                return self.name == other
-            return False
-        return self.__cmp__(other.value if isinstance(other, EnumMember) else other) == 0
+        if other is self:  # members are singletons
+            return True
+        result = int.__eq__(self, other)
+        if result is NotImplemented and isinstance(other, str):
+            # compare by name (for (in)equality only)
+            return self.name == other and other in self.enum
+        return result
 
     def __ne__(self, other):
-        return not self.__eq__(other)
-
-    def __ge__(self, other):
-        return self.__cmp__(other.value if isinstance(other, EnumMember) else other) > -1
-
-    def __gt__(self, other):
-        return self.__cmp__(other.value if isinstance(other, EnumMember) else other) == 1
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
 
     # to be useful in indexing
-    def __hash__(self):
-        return self.value.__hash__()
+    __hash__ = int.__hash__
 
-    # be read-only (except during initialization)
+    # be read-only
     def __setattr__(self, key, value):
-        if key in self.__slots__ and not getattr(self, 'name', None):
-            return object.__setattr__(self, key, value)
         raise TypeError('Modifying EnumMember\'s is not allowed!')
 
     # allow access to other EnumMembers (via the Enum)
@@ -105,121 +76,11 @@ class EnumMember:
     def __repr__(self):
         return f"<{self.enum.name + '.' if self.enum.name else ''}{self.name} ({self.value})>"
 
-    def __bool__(self):
-        return bool(self.value)
-
-    # numeric operations: delegate to int. Do we really need any of those?
-    def __add__(self, other):
-        return self.value.__add__(other.value if isinstance(other, EnumMember) else other)
-
-    def __sub__(self, other):
-        return self.value.__sub__(other.value if isinstance(other, EnumMember) else other)
-
-    def __mul__(self, other):
-        return self.value.__mul__(other.value if isinstance(other, EnumMember) else other)
-
-    def __truediv__(self, other):
-        return self.value.__truediv__(other.value if isinstance(other, EnumMember) else other)
-
-    def __floordiv__(self, other):
-        return self.value.__floordiv__(other.value if isinstance(other, EnumMember) else other)
-
-    def __mod__(self, other):
-        return self.value.__mod__(other.value if isinstance(other, EnumMember) else other)
-
-    def __divmod__(self, other):
-        return self.value.__divmod__(other.value if isinstance(other, EnumMember) else other)
-
-    def __pow__(self, other, *args):
-        return self.value.__pow__(other, *args)
-
-    def __lshift__(self, other):
-        return self.value.__lshift__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rshift__(self, other):
-        return self.value.__rshift__(other.value if isinstance(other, EnumMember) else other)
-
-    def __radd__(self, other):
-        return self.value.__radd__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rsub__(self, other):
-        return self.value.__rsub__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rmul__(self, other):
-        return self.value.__rmul__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rtruediv__(self, other):
-        return self.value.__rtruediv__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rfloordiv__(self, other):
-        return self.value.__rfloordiv__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rmod__(self, other):
-        return self.value.__rmod__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rdivmod__(self, other):
-        return self.value.__rdivmod__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rpow__(self, other, *args):
-        return self.value.__rpow__(other, *args)
-
-    def __rlshift__(self, other):
-        return self.value.__rlshift__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rrshift__(self, other):
-        return self.value.__rrshift__(other.value if isinstance(other, EnumMember) else other)
-
-    # logical operations
-    def __and__(self, other):
-        return self.value.__and__(other.value if isinstance(other, EnumMember) else other)
-
-    def __xor__(self, other):
-        return self.value.__xor__(other.value if isinstance(other, EnumMember) else other)
-
-    def __or__(self, other):
-        return self.value.__or__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rand__(self, other):
-        return self.value.__rand__(other.value if isinstance(other, EnumMember) else other)
-
-    def __rxor__(self, other):
-        return self.value.__rxor__(other.value if isinstance(other, EnumMember) else other)
-
-    def __ror__(self, other):
-        return self.value.__ror__(other.value if isinstance(other, EnumMember) else other)
-
-    # other stuff
-    def __neg__(self):
-        return self.value.__neg__()
-
-    def __pos__(self):
-        return self.value.__pos__()
-
-    def __abs__(self):
-        return self.value.__abs__()
-
-    def __invert__(self):
-        return self.value.__invert__()
-
-    def __int__(self):
-        return self.value.__int__()
-
-    def __float__(self):
-        return self.value.__float__()
-
-    def __index__(self):
-        return self.value.__index__()
-
-    def __format__(self, format_spec):
-        if format_spec.endswith(('d', 'g')):
-            return format(self.value, format_spec)
-        return super().__format__(format_spec)
-
     # note: we do not implement the __i*__ methods as they modify our value
     # inplace and we want to have a const
     def __forbidden__(self, *args):
         raise TypeError('Operation is forbidden!')
-    __iadd__ = __isub__ = __imul__ = __idiv__ = __itruediv__ = __ifloordiv__ = \
+    __iadd__ = __isub__ = __imul__ = __itruediv__ = __ifloordiv__ = \
         __imod__ = __ipow__ = __ilshift__ = __irshift__ = __iand__ = \
         __ixor__ = __ior__ = __forbidden__
 
@@ -265,20 +126,21 @@ class Enum(dict):
         if not isinstance(name, str):
             raise TypeError('1st argument to Enum must be a name or an Enum!')
 
-        names = set()
-        values = set()
+        members = []
+        maxvalue = None
 
         def add(self, k, v):
             """helper for creating the enum members"""
+            nonlocal maxvalue
             if v is None:
                 # sugar: take the next free number if value was None
-                v = max(values or [0]) + 1
+                v = 1 if maxvalue is None else maxvalue + 1
             # sugar: if value is a name of another member,
             # auto-assign the smallest free number which is bigger
             # then that assigned to that name
-            if v in names:
+            if isinstance(v, str) and v in self:
                 v = self[v].value
-                while v in values:
+                while v in self:
                     v += 1
 
             # check that the value is an int
@@ -288,19 +150,28 @@ class Enum(dict):
             v = _v
 
             # check for duplicates
-            if self.get(k, v) != v:
-                raise TypeError(f'{k}={v} conflicts with {k}={self[k]}')
-            if self.get(v, k) != k:
-                raise TypeError(f'{k}={v} conflicts with {self[v].name}={v}')
+            if k in self or v in self:
+                if self.get(k, v) != v:
+                    raise TypeError(f'{k}={v} conflicts with {k}={self[k]}')
+                if self.get(v, k) != k:
+                    raise TypeError(f'{k}={v} conflicts with {self[v].name}={v}')
+                return  # matching duplicate
 
             # remember it
-            self[v] = self[k] = EnumMember(self, k, v)
-            names.add(k)
-            values.add(v)
+            member = EnumMember(self, k, v)
+            self._addMember(member)
+            members.append(member)
+            if maxvalue is None or v > maxvalue:
+                maxvalue = v
 
         if isinstance(parent, Enum):
+            # the members of the parent are known to be consistent
             for m in parent.members:
-                add(self, m.name, m.value)
+                member = EnumMember(self, m.name, m.value)
+                self._addMember(member)
+                members.append(member)
+            if members:
+                maxvalue = max(members).value
         elif isinstance(parent, dict):
             for k, v in parent.items():
                 add(self, k, v)
@@ -308,14 +179,16 @@ class Enum(dict):
             raise TypeError('parent (if given) MUST be a dict or an Enum!')
         for k, v in kwds.items():
             add(self, k, v)
-        self.members = tuple(sorted(self[n] for n in names))
+        self.members = tuple(sorted(members))
         self.name = name
 
-    def __getattr__(self, key):
-        try:
-            return self[key]
-        except KeyError as e:
-            raise AttributeError(str(e)) from None
+    def _addMember(self, member):
+        # the Enum is still under construction: skip the checks in __setitem__
+        dict.__setitem__(self, member.value, member)
+        dict.__setitem__(self, member.name, member)
+        # members are plain instance attributes, unless the name is taken
+        if member.name not in RESERVED_NAMES:
+            self.__dict__[member.name] = member
 
     def __setattr__(self, key, value):
         if self.name and key != 'name':
@@ -333,5 +206,9 @@ class Enum(dict):
     def __repr__(self):
         return 'Enum(%r, %s)' % (self.name, ', '.join('%s=%d' % (m.name, m.value) for m in self.members))
 
-    def __call__(self, key):
-        return self[key]
+    # calling the Enum is just a lookup by name or value
+    __call__ = dict.__getitem__
+
+
+# names which can not be used to access members as attributes
+RESERVED_NAMES = frozenset(dir(Enum)) | {'members'}
@@ -44,8 +44,9 @@ class HasControlledBy:
         if not self.inputCallbacks:
             self.inputCallbacks = {}
         self.inputCallbacks[name] = deactivate_control
-        prev_enum = self.parameters['controlled_by'].datatype.export_datatype()['members']
+        prev_enum = self.parameters['controlled_by'].datatype._enum
         # add enum member, using autoincrement feature of Enum
+        # extending the Enum directly avoids the round trip through export_datatype
         self.parameters['controlled_by'].datatype = EnumType(Enum(prev_enum, **{name: None}))
 
     def self_controlled(self):
@@ -1,4 +1,4 @@
-import time
+import threading
 
 
 from frappy.datatypes import FloatRange, StringType, StructOf, ArrayOf,StatusType,EnumType
@@ -20,6 +20,12 @@ Mode = Enum('mode',
 
 )    
 
+BAR_SCAN = Mode.BAR_SCAN
+
+# fixed status values, built once
+STATUS_READING = BUSY, 'reading Spectrum'
+STATUS_FINISHED = IDLE, 'Spectrum finished'
+
 Device = Enum('device',
     FARADAY = 0,
     SEM = 1
@@ -191,7 +197,10 @@ class MassSpectrometer(Readable):
 
     def initModule(self):
         super().initModule()
-        self._stopflag = False
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()  # set when a scan is requested
+        self._rng = np.random.default_rng()
+        self._bar_scan = (None, None)  # ((start, end, increment), mass array)
         self._thread = mkthread(self.thread)
         self.interface_classes = ['Triggerable','Readable']
     
@@ -260,60 +269,36 @@ class MassSpectrometer(Readable):
         if self.status[0] == BUSY:
             return
 
-        self.status = self.Status.BUSY, 'reading Spectrum'
+        self.status = STATUS_READING
         self.go_flag = True
+        self._wake.set()
 
 
 
-    def getSpectrum(self,dummy:bool = False) -> list[float]:
-        if self.mode == Mode('BAR_SCAN'):
-            self.mass = np.arange(start=self.start_mass,stop=self.end_mass+self.increment,step=self.increment).tolist()
-            num_mass = len(self.mass)
-            
-            if dummy:
-                return np.zeros(num_mass)
-            
-            print(np.random.randint(0,1000,num_mass).tolist())
-            
-            return np.random.randint(0,1000,num_mass).tolist()
-
-
-            
-
-
-        elif self.mode == Mode('MID_SCAN'):
+    def getSpectrum(self,dummy:bool = False) -> np.ndarray:
+        # arrays are converted to tuples by the parameter validation only
+        if self.mode == BAR_SCAN:
+            key = (self.start_mass, self.end_mass, self.increment)
+            if self._bar_scan[0] != key:
+                self._bar_scan = key, np.arange(start=self.start_mass,stop=self.end_mass+self.increment,step=self.increment)
+            self.mass = self._bar_scan[1]
+        else:  # MID_SCAN
             self.mass = self.mid_descriptor['mass']
-            num_mass = len(self.mass)
-            
-            if dummy:
-                return np.zeros(num_mass)
-            
-            print(np.random.randint(0,1000,num_mass).tolist())
-
-            return np.random.randint(0,1000,num_mass).tolist()
-            
-      
-        else:
-            
-            self.mass = np.random.randint(0,1000,num_mass).tolist()
-            
+        num_mass = len(self.mass)
 
-            if dummy:
-                return np.zeros(len(self.mass))
-
-            return np.random.randint(0,1000,num_mass).tolist()
-        
-
-
-        
+        if dummy:
+            return np.zeros(num_mass)
 
+        spectrum = self._rng.integers(0,1000,num_mass,dtype=np.int32)
+        self.log.debug('spectrum: %s', spectrum)
+        return spectrum
 
     def thread(self):
         self.spectrum = self.getSpectrum(dummy=True)
         self.go_flag = False
 
         self.status = self.Status.IDLE, ''
-        while not self._stopflag:
+        while not self._stop_event.is_set():
             try:
                 self.__sim()
             except Exception as e:
@@ -324,17 +309,20 @@ class MassSpectrometer(Readable):
 
         # keep history values for stability check
 
-        while not self._stopflag:
+        while not self._stop_event.is_set():
 
             if self.go_flag:
-                time.sleep(self.aquire_time)
+                if self._stop_event.wait(self.aquire_time):
+                    return
                 self.spectrum = self.getSpectrum(dummy=False)
                 if self.scan_cycle == 'SINGLE':
-                    self.status = self.Status.IDLE, 'Spectrum finished'
+                    self.status = STATUS_FINISHED
                     self.go_flag = False
                 self.read_value()
-                
-            time.sleep(0.1)
+            else:
+                # sleep until go() or shutdownModule() is called
+                self._wake.wait()
+                self._wake.clear()
                 
             
                 
@@ -344,7 +332,8 @@ class MassSpectrometer(Readable):
 
     def shutdownModule(self):
         # should be called from server when the server is stopped
-        self._stopflag = True
+        self._stop_event.set()
+        self._wake.set()
         if self._thread and self._thread.is_alive():
             self._thread.join()
 
@@ -43,56 +43,106 @@ class Ls370Sim(Communicator):
 
     CHANNELS = list(range(1, 17))
     data = ()
+    _steps = 0  # number of simulation steps not yet applied to the readings
+
+    @classmethod
+    def channelItems(cls):
+        """initial (key, value) items of all channel commands, built once per class"""
+        items = cls.__dict__.get('_channelItems')
+        if items is None:
+            items = tuple((fmt % chan, v) for fmt, v in cls.CHANNEL_COMMANDS for chan in cls.CHANNELS)
+            cls._channelItems = items
+        return items
 
     def earlyInit(self):
         super().earlyInit()
         self.data = dict(self.OTHER_COMMANDS)
-        for fmt, v in self.CHANNEL_COMMANDS:
-            for chan in self.CHANNELS:
-                self.data[fmt % chan] = v
+        self.data.update(self.channelItems())
+        # readings are kept as float and formatted only when queried
+        self._rdgr = {}
+        # RDGST replies are derived from the excitation off flag (last field of RDGRNG)
+        self._excoff = {}  # excoff by RDGST key
+        self._rdgst = {}  # RDGST key by RDGRNG key
+        for chan in self.CHANNELS:
+            rdgr, rdgst, rdgrng = f'RDGR?{chan}', f'RDGST?{chan}', f'RDGRNG?{chan}'
+            if rdgr in self.data:
+                self._rdgr[rdgr] = float(self.data[rdgr])
+            if rdgrng in self.data:
+                self._rdgst[rdgrng] = rdgst
+                self._excoff[rdgst] = self.data[rdgrng].split(',')[-1]
+        # (channel, RDGR key) pairs used in updateReadings
+        self._channel_keys = [(chan, f'RDGR?{chan}') for chan in self.CHANNELS
+                              if f'RDGR?{chan}' in self._rdgr]
 
     def doPoll(self):
         super().doPoll()
         self.simulate()
 
     def simulate(self):
-        # not really a simulation. just for testing RDGST
-        for channel in self.CHANNELS:
-            _, _, _, _, excoff = self.data[f'RDGRNG?{channel}'].split(',')
-            if excoff == '1':
-                self.data[f'RDGST?{channel}'] = '6'
-            else:
-                self.data[f'RDGST?{channel}'] = '0'
-        for chan in self.CHANNELS:
-            prev = float(self.data['RDGR?%d' % chan])
+        # the readings are brought up to date when queried, see updateReadings
+        self._steps += 1
+
+    def updateReadings(self):
+        """apply the simulation steps done since the last call"""
+        if self._steps:
             # simple simulation: exponential convergence to 100 * channel number
-            # using a weighted average
-            self.data['RDGR?%d' % chan] = '%g' % (0.99 * prev + 0.01 * 100 * chan)
+            # using a weighted average with weight 0.99 per step
+            factor = 0.99 ** self._steps
+            rdgr = self._rdgr
+            for chan, key in self._channel_keys:
+                target = 100 * chan
+                rdgr[key] = target + (rdgr[key] - target) * factor
+            self._steps = 0
 
     def communicate(self, command):
-        self.comLog(f'> {command}')
-
-        chunks = command.split(';')
-        reply = []
-        for chunk in chunks:
-            if '?' in chunk:
-                chunk = chunk.replace('? ', '?')
-                reply.append(self.data[chunk])
-            else:
-                for nqarg in (1, 0):
-                    if nqarg == 0:
-                        qcmd, arg = chunk.split(' ', 1)
-                        qcmd += '?'
-                    else:
-                        qcmd, arg = chunk.split(',', nqarg)
-                        qcmd = qcmd.replace(' ', '?', 1)
-                    if qcmd in self.data:
-                        self.data[qcmd] = arg
-                        break
-        reply = ';'.join(reply)
-        self.comLog(f'< {reply}')
+        self.comLog('> %s', command)
+        if ';' in command:
+            replies = (self.handleCommand(chunk) for chunk in command.split(';'))
+            reply = ';'.join(r for r in replies if r is not None)
+        else:
+            reply = self.handleCommand(command)
+            if reply is None:
+                reply = ''
+        self.comLog('< %s', reply)
         return reply
 
+    def handleCommand(self, chunk):
+        """handle a single command
+
+        :return: the reply to a query or None
+        """
+        if '?' in chunk:
+            chunk = chunk.replace('? ', '?')
+            return self.getData(chunk)
+        # '<cmd> <chan>,<arg>' sets '<cmd>?<chan>', '<cmd> <arg>' sets '<cmd>?'
+        cmd, _, arg = chunk.partition(' ')
+        chan, sep, chanarg = arg.partition(',')
+        qcmd = f'{cmd}?{chan}'
+        if sep and qcmd in self.data:
+            self.setData(qcmd, chanarg)
+        elif cmd + '?' in self.data:
+            self.setData(cmd + '?', arg)
+        return None
+
+    def getData(self, key):
+        """get the reply to a query"""
+        if key in self._rdgr:
+            self.updateReadings()
+            return '%g' % self._rdgr[key]
+        if key in self._excoff:
+            # not really a simulation. just for testing RDGST
+            return '6' if self._excoff[key] == '1' else '0'
+        return self.data[key]
+
+    def setData(self, key, value):
+        """store a value set by a command"""
+        self.data[key] = value
+        if key in self._rdgst:
+            self._excoff[self._rdgst[key]] = value.split(',')[-1]
+        elif key in self._rdgr:
+            self.updateReadings()
+            self._rdgr[key] = float(value)
+
 
 class Ls336Sim(Ls370Sim):
     CHANNEL_COMMANDS = [
@@ -113,19 +163,35 @@ class Ls336Sim(Ls370Sim):
 
     vti = 295
     sample = 295
+    # typed copies of RANGE?1 and SETP?1, updated by setData
+    _range = 0
+    _setp = 0.0
+    _steady = False  # the model reached a fixed point, nothing changes until a command sets a value
 
     def simulate(self):
+        if self._steady:
+            return
         # simple temperature control on channel A:
-        range_ = int(self.data['RANGE?1'])
-        setp = float(self.data['SETP?1'])
-        if range_:
+        setp = self._setp
+        if self._range:
             # heater on: approach setpoint with 20 sec time constant
-            self.vti = max(self.vti - 0.1, self.vti + (setp - self.vti) * 0.05)
+            vti = max(self.vti - 0.1, self.vti + (setp - self.vti) * 0.05)
         else:
             # heater off 0.1/sec cool down
-            self.vti = max(1.5, self.vti - 0.1)
+            vti = max(1.5, self.vti - 0.1)
         # sample approaching setpoint with 10 sec time constant, but with some
         # systematic heat loss towards 150 K
-        self.sample = self.sample + (self.vti + (150 - self.vti) * 0.01 - self.sample) * 0.1
+        sample = self.sample + (vti + (150 - vti) * 0.01 - self.sample) * 0.1
+        self._steady = vti == self.vti and sample == self.sample
+        self.vti = vti
+        self.sample = sample
         self.data['KRDG?A'] = str(round(self.vti, 3))
         self.data['KRDG?B'] = str(round(self.sample, 3))
+
+    def setData(self, key, value):
+        super().setData(key, value)
+        if key == 'RANGE?1':
+            self._range = int(value)
+        elif key == 'SETP?1':
+            self._setp = float(value)
+        self._steady = False
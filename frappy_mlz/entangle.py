@@ -32,7 +32,10 @@ MLZ TANGO interface for the respective device classes.
 import re
 import sys
 import threading
-from time import sleep, time as currenttime
+from collections import deque
+from functools import lru_cache
+from logging import DEBUG
+from time import monotonic, sleep
 
 import PyTango
 
@@ -72,6 +75,10 @@ REASON_MAPPING = {
     'Entangle_HardwareFailure': HardwareError,
 }
 
+# upper limit of the exponential backoff between retries, in seconds,
+# not to keep the communication lock for too long
+MAX_RETRY_DELAY = 1
+
 # Tango DevFailed reasons that should not cause a retry
 FATAL_REASONS = {
     'Entangle_ConfigurationError',
@@ -88,6 +95,72 @@ FATAL_REASONS = {
     'API_DeviceNotExported',
 }
 
+# origins of errors raised by Tango itself, not worth to be shown
+TANGO_ORIGINS = ('DeviceProxy::', 'DeviceImpl::', 'Device_3Impl::',
+                 'Device_4Impl::', 'Connection::', 'TangoMonitor::')
+
+# patterns for extracting the interesting parts of common Tango errors
+RE_ATTR_NOT_ALLOWED = re.compile(r'to (read|write) attribute (\w+)')
+RE_CMD_NOT_ALLOWED = re.compile(r'Command (\w+) not allowed when the '
+                                r'device is in (\w+) state')
+RE_NOT_EXPORTED = re.compile(r'Device ([\w/]+) is not')
+RE_CANT_CONNECT = re.compile(r'connect to device ([\w/]+)')
+
+
+def _describe_attr_not_allowed(fulldesc):
+    m = RE_ATTR_NOT_ALLOWED.search(fulldesc)
+    if m:
+        if m.group(1) == 'read':
+            return f'reading {m.group(2)!r} not allowed in current state'
+        return f'writing {m.group(2)!r} not allowed in current state'
+    return fulldesc
+
+
+def _describe_cmd_not_allowed(fulldesc):
+    m = RE_CMD_NOT_ALLOWED.search(fulldesc)
+    if m:
+        return f'executing {m.group(1)!r} not allowed in state {m.group(2)}'
+    return fulldesc
+
+
+def _describe_not_exported(fulldesc):
+    m = RE_NOT_EXPORTED.search(fulldesc)
+    if m:
+        return f'Tango device {m.group(1)} is not exported, is the server running?'
+    return fulldesc
+
+
+def _describe_corba(fulldesc):
+    if 'TRANSIENT_CallTimedout' in fulldesc:
+        return 'Tango client-server call timed out'
+    if 'TRANSIENT_ConnectFailed' in fulldesc:
+        return 'connection to Tango server failed, is the server running?'
+    return fulldesc
+
+
+def _describe_cant_connect(fulldesc):
+    m = RE_CANT_CONNECT.search(fulldesc)
+    if m:
+        return f'connection to Tango device {m.group(1)} failed, is the server running?'
+    return fulldesc
+
+
+def _describe_cmd_timeout(fulldesc):
+    if 'acquire serialization' in fulldesc:
+        return 'Tango call timed out waiting for lock on server'
+    return fulldesc
+
+
+# functions making the description of specific errors more friendly, by reason
+DESCRIBE_REASON = {
+    'API_AttrNotAllowed': _describe_attr_not_allowed,
+    'API_CommandNotAllowed': _describe_cmd_not_allowed,
+    'API_DeviceNotExported': _describe_not_exported,
+    'API_CorbaException': _describe_corba,
+    'API_CantConnectToDevice': _describe_cant_connect,
+    'API_CommandTimedOut': _describe_cmd_timeout,
+}
+
 
 def describe_dev_error(exc):
     """Return a better description for a Tango exception.
@@ -96,51 +169,31 @@ def describe_dev_error(exc):
     consumption.  Map the most common ones, that can also happen during normal
     operation, to a bit more friendly ones.
     """
-    # general attributes
-    reason = exc.reason.strip()
-    fulldesc = reason + ': ' + exc.desc.strip()
+    return _format_dev_error(exc.reason, exc.desc, exc.origin)
+
+
+@lru_cache(maxsize=256)
+def _format_dev_error(reason, desc, origin):
+    """describe_dev_error from the (hashable) attributes of the exception
+
+    cached, as the same error is often raised repeatedly by retries
+    """
+    reason = reason.strip()
+    fulldesc = reason + ': ' + desc.strip()
     # reduce Python tracebacks
-    if '\n' in exc.origin and 'File ' in exc.origin:
-        origin = exc.origin.splitlines()[-2].strip()
+    if '\n' in origin and 'File ' in origin:
+        origin = origin.splitlines()[-2].strip()
     else:
-        origin = exc.origin.strip()
+        origin = origin.strip()
 
     # we don't need origin info for Tango itself
-    if origin.startswith(('DeviceProxy::', 'DeviceImpl::', 'Device_3Impl::',
-                          'Device_4Impl::', 'Connection::', 'TangoMonitor::')):
+    if origin.startswith(TANGO_ORIGINS):
         origin = None
 
     # now handle specific cases better
-    if reason == 'API_AttrNotAllowed':
-        m = re.search(r'to (read|write) attribute (\w+)', fulldesc)
-        if m:
-            if m.group(1) == 'read':
-                fulldesc = 'reading %r not allowed in current state'
-            else:
-                fulldesc = 'writing %r not allowed in current state'
-            fulldesc %= m.group(2)
-    elif reason == 'API_CommandNotAllowed':
-        m = re.search(r'Command (\w+) not allowed when the '
-                      r'device is in (\w+) state', fulldesc)
-        if m:
-            fulldesc = f'executing {m.group(1)!r} not allowed in state {m.group(2)}'
-    elif reason == 'API_DeviceNotExported':
-        m = re.search(r'Device ([\w/]+) is not', fulldesc)
-        if m:
-            fulldesc = f'Tango device {m.group(1)} is not exported, is the server running?'
-    elif reason == 'API_CorbaException':
-        if 'TRANSIENT_CallTimedout' in fulldesc:
-            fulldesc = 'Tango client-server call timed out'
-        elif 'TRANSIENT_ConnectFailed' in fulldesc:
-            fulldesc = 'connection to Tango server failed, is the server ' \
-                'running?'
-    elif reason == 'API_CantConnectToDevice':
-        m = re.search(r'connect to device ([\w/]+)', fulldesc)
-        if m:
-            fulldesc = f'connection to Tango device {m.group(1)} failed, is the server running?'
-    elif reason == 'API_CommandTimedOut':
-        if 'acquire serialization' in fulldesc:
-            fulldesc = 'Tango call timed out waiting for lock on server'
+    describe = DESCRIBE_REASON.get(reason)
+    if describe:
+        fulldesc = describe(fulldesc)
 
     # append origin if wanted
     if origin:
@@ -148,6 +201,18 @@ def describe_dev_error(exc):
     return fulldesc
 
 
+def check_attributes(attrs):
+    """check the DeviceAttributes returned by read_attributes
+
+    read_attributes does not raise when a single attribute fails,
+    raise the error of the first failed attribute instead
+    """
+    for attr in attrs:
+        if attr.has_failed:
+            raise PyTango.DevFailed(*attr.get_err_stack())
+    return attrs
+
+
 class BasePyTangoDevice:
     """
     Basic PyTango device.
@@ -187,26 +252,43 @@ class BasePyTangoDevice:
         Parameter "info" is passed to _com_return and _com_raise methods that
         process the return value or exception raised after maximum tries.
         """
-        tries = self.comtries
         with self._com_lock:
-            while True:
-                tries -= 1
-                try:
-                    result = function(*args, **kwds)
-                    return self._com_return(result, info)
-                except Exception as err:
-                    if tries == 0:
-                        self._com_raise(err, info)
-                    else:
-                        name = getattr(function, '__name__', 'communication')
-                        self._com_warn(tries, name, err, info)
-                    sleep(self.comdelay)
+            return self._com_retry_unlocked(info, function, *args, **kwds)
+
+    def _com_retry_unlocked(self, info, function, *args, **kwds):
+        """Like _com_retry, but without holding the communication lock.
+
+        For calls which may run concurrently, like attribute reads: the
+        DeviceProxy is thread safe, the lock is only needed for keeping
+        the order of writes and commands.
+        """
+        tries = self.comtries
+        delay = self.comdelay
+        # the backoff is limited to MAX_RETRY_DELAY, larger delays stay fixed
+        max_delay = max(delay, MAX_RETRY_DELAY)
+        while True:
+            tries -= 1
+            try:
+                result = function(*args, **kwds)
+                return self._com_return(result, info)
+            except Exception as err:
+                reason = self._tango_exc_reason(err)
+                if tries == 0:
+                    self._com_raise(err, info, reason)
+                else:
+                    name = getattr(function, '__name__', 'communication')
+                    self._com_warn(tries, name, err, info, reason)
+                sleep(delay)
+                # back off when the error persists
+                delay = min(delay * 2, max_delay)
 
     def earlyInit(self):
         # Wrap PyTango client creation (so even for the ctor, logging and
         # exception mapping is enabled).
         self._createPyTangoDevice = self._applyGuardToFunc(
             self._createPyTangoDevice, 'constructor')
+        self._readStateStatus = self._applyGuardToFunc(
+            self._readStateStatus, 'attr_read')
         super().earlyInit()
 
     @lazy_property
@@ -218,23 +300,82 @@ class BasePyTangoDevice:
         self.comdelay, self.comtries = settings
         return res
 
+    _state_event_id = None
+
+    @lazy_property
+    def _state_changed(self):
+        """event set on Tango State change events"""
+        event = threading.Event()
+        try:
+            self._state_event_id = self._dev.subscribe_event(
+                'State', PyTango.EventType.CHANGE_EVENT, lambda _: event.set())
+        except Exception as e:
+            # no change events configured on the server: poll the state only
+            self.log.debug('can not subscribe to State changes: %s', e)
+        return event
+
+    def _wait_while_busy(self, read_status):
+        """Wait until read_status() does not return BUSY."""
+        event = self._state_changed
+        while True:
+            event.clear()  # before reading the status, not to miss a change
+            if read_status()[0] != Drivable.Status.BUSY:
+                return
+            # a State change event cuts the wait short,
+            # polling still works when no events arrive
+            event.wait(0.3)
+
+    def shutdownModule(self):
+        if self._state_event_id is not None:
+            try:
+                self._dev.unsubscribe_event(self._state_event_id)
+            except Exception as e:
+                self.log.debug('can not unsubscribe from State changes: %s', e)
+            self._state_event_id = None
+        super().shutdownModule()
+
     def _hw_wait(self):
         """Wait until hardware status is not BUSY."""
-        while self.read_status()[0] == Drivable.Status.BUSY:
-            sleep(0.3)
+        self._wait_while_busy(self.read_status)
+
+    def _read_attributes(self, names):
+        """read several attributes with one call, returns their values
+
+        the failure of any of them raises the mapped error, after retries
+        """
+        return [attr.value for attr in self._dev.read_attributes(names)]
+
+    def _readStateStatus(self, names, dev):
+        """read the State and Status attributes given in names
+
+        guarded in earlyInit, the fallback is done within the same try
+        """
+        try:
+            attrs = check_attributes(PyTango.DeviceProxy.read_attributes(dev, names))
+            return [attr.value for attr in attrs]
+        except PyTango.DevFailed:
+            # the server does not offer State and Status as attributes
+            return dev.State(), dev.Status()
 
     def _getProperty(self, name, dev=None):
         """
         Utility function for getting a property by name easily.
         """
+        return self._getProperties([name], dev).get(name)
+
+    def _getProperties(self, names, dev=None):
+        """
+        Get several properties by name, returns a dict of the ones found.
+        """
         if dev is None:
             dev = self._dev
-        # Entangle and later API
+        # Entangle and later API: all properties with one call
         if dev.command_query('GetProperties').in_type == PyTango.DevVoid:
             props = dev.GetProperties()
-            return props[props.index(name) + 1] if name in props else None
+            props = dict(zip(props[::2], props[1::2]))
+            return {name: props[name] for name in names if name in props}
         # old (pre-Entangle) API
-        return dev.GetProperties([name, 'device'])[2]
+        return {name: dev.GetProperties([name, 'device'])[2] for name in names}
 
     def _createPyTangoDevice(self, address):  # pylint: disable=E0202
         """
@@ -262,6 +403,14 @@ class BasePyTangoDevice:
                                                      'attr_write')
         dev.__dict__['read_attribute'] = self._applyGuardToFunc(dev.read_attribute,
                                                     'attr_read')
+        read_attributes = dev.read_attributes
+
+        def read_checked_attributes(names):
+            return check_attributes(read_attributes(names))
+
+        read_checked_attributes.__name__ = 'read_attributes'
+        dev.__dict__['read_attributes'] = self._applyGuardToFunc(read_checked_attributes,
+                                                     'attr_read')
         dev.__dict__['attribute_query'] = self._applyGuardToFunc(dev.attribute_query,
                                                      'attr_query')
         return dev
@@ -270,28 +419,45 @@ class BasePyTangoDevice:
         """
         Wrap given function with logging and exception mapping.
         """
-        def wrap(*args, **kwds):
-            # handle different types for better debug output
-            if category == 'cmd':
-                self.log.debug('[PyTango] command: %s%r', args[0], args[1:])
-            elif category == 'attr_read':
-                self.log.debug('[PyTango] read attribute: %s', args[0])
-            elif category == 'attr_write':
-                self.log.debug('[PyTango] write attribute: %s => %r',
-                               args[0], args[1:])
-            elif category == 'attr_query':
-                self.log.debug('[PyTango] query attribute properties: %s',
-                               args[0])
-            elif category == 'constructor':
-                self.log.debug('[PyTango] device creation: %s', args[0])
-            elif category == 'internal':
-                self.log.debug('[PyTango integration] internal: %s%r',
-                               func.__name__, args)
-            else:
-                self.log.debug('[PyTango] call: %s%r', func.__name__, args)
+        log = self.log
+
+        # handle different types for better debug output,
+        # the variant is chosen once here and not on every call
+        if category == 'cmd':
+            def log_call(args):
+                log.debug('[PyTango] command: %s%r', args[0], args[1:])
+        elif category == 'attr_read':
+            def log_call(args):
+                log.debug('[PyTango] read attribute: %s', args[0])
+        elif category == 'attr_write':
+            def log_call(args):
+                log.debug('[PyTango] write attribute: %s => %r',
+                          args[0], args[1:])
+        elif category == 'attr_query':
+            def log_call(args):
+                log.debug('[PyTango] query attribute properties: %s',
+                          args[0])
+        elif category == 'constructor':
+            def log_call(args):
+                log.debug('[PyTango] device creation: %s', args[0])
+        elif category == 'internal':
+            def log_call(args):
+                log.debug('[PyTango integration] internal: %s%r',
+                          func.__name__, args)
+        else:
+            def log_call(args):
+                log.debug('[PyTango] call: %s%r', func.__name__, args)
 
-            info = category + ' ' + args[0] if args else category
-            return self._com_retry(info, func, *args, **kwds)
+        if category in ('attr_read', 'attr_query'):
+            com_retry = self._com_retry_unlocked
+        else:
+            com_retry = self._com_retry
+
+        def wrap(*args, **kwds):
+            if log.isEnabledFor(DEBUG):
+                log_call(args)
+            info = f'{category} {args[0]}' if args else category
+            return com_retry(info, func, *args, **kwds)
 
         # hide the wrapping
         wrap.__name__ = func.__name__
@@ -304,7 +470,9 @@ class BasePyTangoDevice:
         Can raise an exception to initiate a retry.  Default is to return
         result unchanged.
         """
-        # XXX: explicit check for loglevel to avoid expensive reprs
+        # explicit check for loglevel to avoid expensive reprs
+        if not self.log.isEnabledFor(DEBUG):
+            return result
         if isinstance(result, PyTango.DeviceAttribute):
             the_repr = repr(result.value)[:300]
         else:
@@ -328,24 +496,28 @@ class BasePyTangoDevice:
             return err.args[0].reason.strip()
         return ''
 
-    def _com_warn(self, retries, name, err, info):
+    def _com_warn(self, retries, name, err, info, reason=None):
         """Gives the opportunity to warn the user on failed tries.
 
-        Can also call _com_raise to abort early.
+        Can also call _com_raise to abort early.  *reason* may be given when
+        already known.
         """
-        if self._tango_exc_reason(err) in FATAL_REASONS:
-            self._com_raise(err, info)
+        if reason is None:
+            reason = self._tango_exc_reason(err)
+        if reason in FATAL_REASONS:
+            self._com_raise(err, info, reason)
         if retries == self.comtries - 1:
             self.log.warning('%s failed, retrying up to %d times: %s',
                              info, retries, self._tango_exc_desc(err))
 
-    def _com_raise(self, err, info):
+    def _com_raise(self, err, info, reason=None):
         """Process the exception raised either by communication or _com_return.
 
         Should raise a NICOS exception.  Default is to raise
-        CommunicationFailedError.
+        CommunicationFailedError.  *reason* may be given when already known.
         """
-        reason = self._tango_exc_reason(err)
+        if reason is None:
+            reason = self._tango_exc_reason(err)
         exclass = REASON_MAPPING.get(
             reason, EXC_MAPPING.get(type(err), CommunicationFailedError))
         fulldesc = self._tango_exc_desc(err)
@@ -364,9 +536,9 @@ class PyTangoDevice(BasePyTangoDevice):
     status = Parameter(datatype=StatusType(Readable, 'UNKNOWN', 'DISABLED'))
 
     def read_status(self):
-        # Query status code and string
-        tangoState = self._dev.State()
-        tangoStatus = self._dev.Status()
+        # Query status code and string, State and Status are also
+        # attributes of every Tango device: read both with one call
+        tangoState, tangoStatus = self._readStateStatus(['State', 'Status'], self._dev)
 
         # Map status
         myState = self.tango_status_mapping.get(tangoState, StatusType.UNKNOWN)
@@ -483,11 +655,14 @@ class AnalogOutput(PyTangoDevice, Drivable):
 
         tangoabslim = (-sys.float_info.max, sys.float_info.max)
         try:
-            read_tangoabslim = (float(self._getProperty('absmin')),
-                                float(self._getProperty('absmax')))
-            # Entangle convention for "unrestricted"
-            if read_tangoabslim != (0, 0):
-                tangoabslim = read_tangoabslim
+            props = self._getProperties(('absmin', 'absmax'))
+            if 'absmin' in props and 'absmax' in props:
+                read_tangoabslim = (float(props['absmin']), float(props['absmax']))
+                # Entangle convention for "unrestricted"
+                if read_tangoabslim != (0, 0):
+                    tangoabslim = read_tangoabslim
+            else:
+                self.log.error('could not read Tango abslimits: properties missing')
         except Exception as e:
             self.log.error('could not read Tango abslimits: %s' % e)
 
@@ -501,24 +676,23 @@ class AnalogOutput(PyTangoDevice, Drivable):
                                           'frappy absolute',
                                           'entangle absolute')
 
+        absmin, absmax = self.abslimits
+
         # set abslimits as hard target limits
-        self.parameters['target'].datatype.set_properties(
-            min=self.abslimits[0], max=self.abslimits[1])
+        self.parameters['target'].datatype.set_properties(min=absmin, max=absmax)
 
         # restrict current user limits by abslimits
         self.userlimits = intersect_limits(self.userlimits, self.abslimits,
                                            'user', 'absolute')
 
         # restrict settable user limits by abslimits
-        self.parameters['userlimits'].datatype.members[0].set_properties(
-            min=self.abslimits[0], max=self.abslimits[1])
-        self.parameters['userlimits'].datatype.members[1].set_properties(
-            min=self.abslimits[0], max=self.abslimits[1])
+        for member in self.parameters['userlimits'].datatype.members:
+            member.set_properties(min=absmin, max=absmax)
 
     def initModule(self):
         super().initModule()
         # init history
-        self._history = []  # will keep (timestamp, value) tuple
+        self._history = deque()  # will keep (timestamp, value) tuple
         self._timeout = None  # keeps the time at which we will timeout, or None
 
     def startModule(self, start_events):
@@ -543,11 +717,15 @@ class AnalogOutput(PyTangoDevice, Drivable):
             if self._history[-1][0] - self._history[1][0] <= self.window:
                 break
             # else: remove a stale point
-            self._history.pop(0)
+            self._history.popleft()
+
+    def _addHistory(self, value):
+        """keep a value read from the device for the stability check"""
+        self._history.append((monotonic(), value))
 
     def read_value(self):
         value = self._dev.value
-        self._history.append((currenttime(), value))
+        self._addHistory(value)
         return value
 
     def read_target(self):
@@ -562,17 +740,25 @@ class AnalogOutput(PyTangoDevice, Drivable):
         # check subset of _history which is in window
         # also check if there is at least one value before window
         # to know we have enough datapoints
-        hist = self._history[:]
-        window_start = currenttime() - self.window
-        hist_in_window = [v for (t, v) in hist if t >= window_start]
-        if len(hist) == len(hist_in_window):
+        window_start = monotonic() - self.window
+        before_window = False
+        min_in_hist = max_in_hist = None
+        # iterate over a copy, as read_value may append in between
+        for t, v in list(self._history):
+            if t < window_start:
+                before_window = True
+            elif min_in_hist is None:
+                min_in_hist = max_in_hist = v
+            elif v < min_in_hist:
+                min_in_hist = v
+            elif v > max_in_hist:
+                max_in_hist = v
+        if not before_window:
             return False  # no data point before window
-        if not hist_in_window:
+        if min_in_hist is None:
             # window is too small -> use last point only
-            hist_in_window = [self.value]
+            min_in_hist = max_in_hist = self.value
 
-        max_in_hist = max(hist_in_window)
-        min_in_hist = min(hist_in_window)
         stable = max_in_hist - min_in_hist <= self.precision
         at_target = max_in_hist - self.precision <= self.target <= min_in_hist + self.precision
 
@@ -587,7 +773,7 @@ class AnalogOutput(PyTangoDevice, Drivable):
             self._timeout = None
             self._moving = False
         else:
-            if self._timeout and self._timeout < currenttime():
+            if self._timeout and self._timeout < monotonic():
                 status = self.Status.UNSTABLE, 'timeout after waiting for stable value'
             elif self._moving:
                 status = (self.Status.BUSY, 'moving: ' + status[1])
@@ -641,7 +827,7 @@ class AnalogOutput(PyTangoDevice, Drivable):
             self._hw_wait()
         self._dev.value = value
         # set meaningful timeout
-        self._timeout = currenttime() + self.window + self.timeout
+        self._timeout = monotonic() + self.window + self.timeout
         if hasattr(self, 'ramp'):
             self._timeout += abs((self.target or self.value) - self.value) / \
                     ((self.ramp or 1e-8) * 60)
@@ -658,8 +844,8 @@ class AnalogOutput(PyTangoDevice, Drivable):
         return self.read_target()
 
     def _hw_wait(self):
-        while super().read_status()[0] == self.Status.BUSY:
-            sleep(0.3)
+        # check the Tango state only, not the stability of the value
+        self._wait_while_busy(super().read_status)
 
     def stop(self):
         """cease driving, go to IDLE state"""
@@ -771,10 +957,12 @@ class TemperatureController(Actuator):
     precision = Parameter(default=0.1)
     ramp = Parameter(description='Temperature ramp')
 
-    def doPoll(self):
-        super().doPoll()
-        self.read_setpoint()
-        self.read_heateroutput()
+    def read_value(self):
+        # setpoint and heater output are polled with the value in one Tango call
+        value, self.setpoint, self.heateroutput = self._read_attributes(
+            ['value', 'setpoint', 'heaterOutput'])
+        self._addHistory(value)
+        return value
 
     def read_ramp(self):
         return self._dev.ramp
@@ -802,9 +990,8 @@ class TemperatureController(Actuator):
         self._dev.d = value
 
     def read_pid(self):
-        self.read_p()
-        self.read_i()
-        self.read_d()
+        # one Tango call for all three attributes
+        self.p, self.i, self.d = self._read_attributes(['p', 'i', 'd'])
         return self.p, self.i, self.d
 
     def write_pid(self, value):
@@ -836,11 +1023,13 @@ class PowerSupply(Actuator):
     # overrides
     ramp = Parameter(description='Current/voltage ramp')
 
-    def doPoll(self):
-        super().doPoll()
-        # TODO: poll voltage and current faster when busy
-        self.read_voltage()
-        self.read_current()
+    def read_value(self):
+        # voltage and current are polled with the value in one Tango call,
+        # this way they are also polled faster when busy
+        value, self.voltage, self.current = self._read_attributes(
+            ['value', 'voltage', 'current'])
+        self._addHistory(value)
+        return value
 
     def read_ramp(self):
         return self._dev.ramp
@@ -28,11 +28,21 @@ the name of the loss module may be configured, or disabled by choosing
 an empty name
 """
 
+import re
+
 from frappy.core import FloatRange, HasIO, Parameter, Readable, StringIO, nopoll, \
     Attached, Property, StringType
 from frappy.dynamic import Pinata
 
 
+# examples of replies to SI:
+# 'F= 1000.0  HZ C= 0.000001    PF L> 0.0         DS V= 15.0     V'
+# 'F= 1000.0  HZ C= 0.0000059   PF L=-0.4         DS V= 15.0     V OVEN'
+# 'LOSS TOO HIGH'
+# '>' instead of '=' marks a value out of range
+SI_REPLY = re.compile(r'F=\s*(\S+)\s+HZ\s+C[=>]\s*(\S+)\s+PF\s+L[=>]\s*(\S+)\s+(\S+)\s+V[=>]\s*(\S+)')
+
+
 class Ah2700IO(StringIO):
     end_of_line = '\r\n'
     timeout = 5
@@ -64,42 +74,37 @@ class Capacitance(HasIO, Pinata, Readable):
         if reply.startswith('SI'):  # this is an echo
             self.communicate('SERIAL ECHO OFF')
             reply = self.communicate('SI')
-        if not reply.startswith('F='):  # this is probably an error message like "LOSS TOO HIGH"
+        match = SI_REPLY.match(reply)
+        if not match:  # this is probably an error message like "LOSS TOO HIGH"
             self.status = self.Status.ERROR, reply
             return self.value
         self.status = self.Status.IDLE, ''
-        # examples of replies:
-        # 'F= 1000.0  HZ C= 0.000001    PF L> 0.0         DS V= 15.0     V'
-        # 'F= 1000.0  HZ C= 0.0000059   PF L=-0.4         DS V= 15.0     V OVEN'
-        # 'LOSS TOO HIGH'
-        # make sure there is always a space after '=' and '>'
-        # split() ignores multiple white space
-        reply = reply.replace('=', '= ').replace('>', '> ').split()
-        _, freq, _, _, cap, _, _, loss, lossunit, _, volt = reply[:11]
-        self.freq = freq
-        self.voltage = volt
+        freq, cap, loss, lossunit, volt = match.groups()
+        self.freq = float(freq)
+        self.voltage = float(volt)
         if lossunit == 'DS':
-            self.loss = loss
-        else:  # the unit was wrong, we want DS = tan(delta), not NS = nanoSiemens
-            reply = self.communicate('UN DS').split()  # UN DS returns a reply similar to SI
-            try:
-                self.loss = reply[7]
-            except IndexError:
-                pass  # don't worry, loss will be updated next time
-        return cap
+            self.loss = float(loss)
+        else:  # the unit was changed (e.g. on the front panel), we want DS = tan(delta), not NS = nanoSiemens
+            match = SI_REPLY.match(self.communicate('UN DS'))  # UN DS returns a reply similar to SI
+            if match:  # else don't worry, loss will be updated next time
+                self.loss = float(match.group(3))
+        return float(cap)
+
+    def initialReads(self):
+        # we want the loss in DS = tan(delta), set the unit once instead of
+        # correcting it in parse_reply
+        self.communicate('UN DS')
 
     def read_value(self):
         return self.parse_reply(self.communicate('SI'))  # SI = single trigger
 
     @nopoll
     def read_freq(self):
-        self.read_value()
-        return self.freq
+        return self.freq  # updated on every reading of the value
 
     @nopoll
     def read_voltage(self):
-        self.read_value()
-        return self.voltage
+        return self.voltage  # updated on every reading of the value
 
     def write_freq(self, value):
         self.value = self.parse_reply(self.communicate(f'FR {value:g};SI'))
@@ -0,0 +1,61 @@
+# *****************************************************************************
+#
+# This program is free software; you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation; either version 2 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# *****************************************************************************
+"""test parsing of the Andeen Hagerling capacitance bridge replies"""
+
+from test.test_modules import LoggerStub, ServerStub
+import pytest
+from frappy_psi.ah2700 import Capacitance
+
+
+class Cap(Capacitance):
+    def communicate(self, command):
+        raise AssertionError(f'unexpected command {command!r}')
+
+
+@pytest.fixture
+def cap():
+    return Cap('cap', LoggerStub(), {'description': '', 'io': 'io'}, ServerStub({}))
+
+
+@pytest.mark.parametrize('reply, value, loss, freq, voltage', [
+    ('F= 1000.0  HZ C= 0.000001    PF L> 0.0         DS V= 15.0     V',
+     0.000001, 0.0, 1000, 15),
+    ('F= 1000.0  HZ C= 0.0000059   PF L=-0.4         DS V= 15.0     V OVEN',
+     0.0000059, -0.4, 1000, 15),
+    ('F= 1000.0  HZ C> 1500.0      PF L= 0.01        DS V> 15.0     V',
+     1500, 0.01, 1000, 15),
+])
+def test_parse_reply(cap, reply, value, loss, freq, voltage):
+    assert cap.parse_reply(reply) == value
+    assert cap.loss == loss
+    assert cap.freq == freq
+    assert cap.voltage == voltage
+    assert cap.status[0] == cap.Status.IDLE
+
+
+def test_parse_error_reply(cap):
+    cap.value = 1.5
+    assert cap.parse_reply('LOSS TOO HIGH') == 1.5
+    assert cap.status == (cap.Status.ERROR, 'LOSS TOO HIGH')
+
+
+def test_parse_reply_unit_changed(cap):
+    replies = ['F= 1000.0  HZ C= 0.0000059   PF L=-0.4         DS V= 15.0     V']
+    cap.communicate = lambda command: replies.pop()
+    assert cap.parse_reply('F= 1000.0  HZ C= 0.0000059   PF L= 12.0        NS V= 15.0     V') == 0.0000059
+    assert cap.loss == -0.4
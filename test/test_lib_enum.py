@@ -91,3 +91,16 @@ def test_Enum_duplicate():
         Enum(e, b=3, c=4)  # duplicate name with value mismatch
     with pytest.raises(TypeError):
         Enum(e, c=1)  # duplicate value with name mismatch
+
+
+def test_EnumMember_int():
+    e = Enum('e', idle=1, busy=2)
+    assert isinstance(e.idle, int)
+    assert e.idle == 'idle'
+    assert e.idle != 'busy'
+    assert e.idle != 'undefined'
+    assert hash(e.busy) == hash(2)
+    assert {1: 'x'}[e.idle] == 'x'
+    assert e.idle.busy is e.busy
+    assert f'{e.busy}' == '<e.busy (2)>'
+    assert f'{e.busy:d}' == '2'
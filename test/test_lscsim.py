@@ -0,0 +1,100 @@
+# *****************************************************************************
+#
+# This program is free software; you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free Software
+# Foundation; either version 2 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+# details.
+#
+# You should have received a copy of the GNU General Public License along with
+# this program; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+# *****************************************************************************
+"""test the LakeShore simulator"""
+
+from test.test_modules import ServerStub
+import pytest
+from frappy_demo.lscsim import Ls336Sim, Ls370Sim
+
+
+class LoggerStub:
+    def debug(self, fmt, *args):
+        pass
+    info = warning = exception = error = debug
+    handlers = []
+
+    def log(self, level, fmt, *args):
+        pass
+
+
+def make(cls):
+    sim = cls('lsc', LoggerStub(), {'description': ''}, ServerStub({}))
+    sim.earlyInit()
+    return sim
+
+
+@pytest.fixture
+def ls370():
+    return make(Ls370Sim)
+
+
+@pytest.mark.parametrize('query', ['FILTER?3', 'FILTER? 3'])
+def test_query(ls370, query):
+    assert ls370.communicate(query) == '1,5,80'
+
+
+def test_set_channel(ls370):
+    assert ls370.communicate('FILTER 3,0,10,50') == ''
+    assert ls370.communicate('FILTER?3') == '0,10,50'
+    assert ls370.communicate('FILTER?4') == '1,5,80'
+
+
+def test_set_without_channel(ls370):
+    assert ls370.communicate('SCAN 5,0') == ''
+    assert ls370.communicate('SCAN?') == '5,0'
+
+
+def test_multi_command(ls370):
+    assert ls370.communicate('SCAN 2,1;SCAN?;*OPC?') == '2,1;1'
+    assert ls370.communicate('INSET?1;FILTER?1') == '1,5,5,0,0;1,5,80'
+
+
+def test_rdgst(ls370):
+    assert ls370.communicate('RDGST?2') == '0'
+    ls370.communicate('RDGRNG 2,0,5,5,0,1')  # last field: excitation off
+    assert ls370.communicate('RDGST?2') == '6'
+    assert ls370.communicate('RDGST?1') == '0'
+    ls370.communicate('RDGRNG 2,0,5,5,0,0')
+    assert ls370.communicate('RDGST?2') == '0'
+
+
+def test_rdgr_convergence(ls370):
+    assert ls370.communicate('RDGR?1') == '200'
+    ls370.communicate('RDGR 3,1000')
+    expected = {1: 200.0, 3: 1000.0}
+    for _ in range(50):
+        ls370.simulate()
+        for chan, value in expected.items():
+            expected[chan] = value * 0.99 + 100 * chan * 0.01
+    for chan, value in expected.items():
+        assert float(ls370.communicate(f'RDGR?{chan}')) == pytest.approx(value, rel=1e-5)
+    # readings are not changed by queries
+    assert float(ls370.communicate('RDGR?1')) == pytest.approx(expected[1], rel=1e-5)
+
+
+def test_ls336_setpoint():
+    sim = make(Ls336Sim)
+    sim.communicate('SETP 1,290;RANGE 1,3')
+    for _ in range(1000):
+        sim.simulate()
+    assert float(sim.communicate('KRDG?A')) == pytest.approx(290, abs=0.01)
+    # the simulation continues after a change, even when it was steady before
+    sim.communicate('SETP 1,285')
+    for _ in range(1000):
+        sim.simulate()
+    assert float(sim.communicate('KRDG?A')) == pytest.approx(285, abs=0.01)